@@ -0,0 +1,168 @@
+'''
+This file contains the calculations shared by the fixed and variable rate bonds
+
+Created: 09/27/2018 (mm/dd/yyyy)
+
+Written by: Eric Lee
+'''
+import calendar
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+
+
+@lru_cache(maxsize=4096)
+def _calendar_360(t_year, t_month, t_day, m_year, m_month, m_day, freq):
+    '''
+    Returns (n, T, t) under the 30/360 day count convention.
+    '''
+    if (t_month==2) and (t_day==calendar.monthrange(t_year,t_month)[-1]):
+        t_day = 30
+    if (m_month==2) and (m_day==calendar.monthrange(m_year,m_month)[-1]):
+        m_day = 30
+    if t_day in (30,31) and m_day==31:
+        m_day = 30
+    if t_day>30:
+        t_day = 30
+
+    n_days = 360*(m_year-t_year) + 30*(m_month-t_month) + (m_day-t_day)
+    n = int(np.ceil(n_days/ 360 * freq))
+    T = 360/ freq
+    t = T - n_days%T
+    return n, T, t
+
+
+def _calendar_360_vec(t_year, t_month, t_day, m_year, m_month, m_day, freq):
+    '''
+    Array version of _calendar_360 for building many bonds at once.
+    The day adjustments are applied as masks instead of branches.
+    '''
+    t_year, t_month, t_day, m_year, m_month, m_day = (np.asarray(a, dtype=np.int64) for a in
+        (t_year, t_month, t_day, m_year, m_month, m_day))
+    t_leap = ((t_year%4==0) & (t_year%100!=0)) | (t_year%400==0)
+    m_leap = ((m_year%4==0) & (m_year%100!=0)) | (m_year%400==0)
+
+    t_day = np.where((t_month==2) & (t_day==np.where(t_leap, 29, 28)), 30, t_day)
+    m_day = np.where((m_month==2) & (m_day==np.where(m_leap, 29, 28)), 30, m_day)
+    m_day = np.where((t_day>=30) & (m_day==31), 30, m_day)
+    t_day = np.minimum(t_day, 30)
+
+    n_days = 360*(m_year-t_year) + 30*(m_month-t_month) + (m_day-t_day)
+    n = np.ceil(n_days/ 360 * freq).astype(np.int64)
+    T = 360/ freq
+    t = T - n_days%T
+    return n, T, t
+
+
+
+class _BondBase:
+
+
+    def __init__(self, tDate, mDate, fv, ac, freq, ytm=np.nan, c_list=[], calendarDays=365):
+        '''
+        Passes on variables needed for all bond calculations.
+
+        tDate = transaction date
+        mDate = maturity date
+        n = number of periods
+
+        fv = face/par value
+        ac = annual coupon rate
+        c = coupon rate per period
+        ytm = yield to maturity (annual)
+        y = yield per period
+        apmt = annual coupon
+        pmt = coupon per period
+        freq = coupon frequency per year
+        t = days passed since last coupon
+        T = days per coupon period
+        '''
+        if np.isnan(ytm):
+            print("***WARNING*** No YTM specified!")
+        if (isinstance(tDate,str) and isinstance(mDate,str)):
+            self.tDate = datetime.strptime(tDate, '%d/%m/%Y')
+            self.mDate = datetime.strptime(mDate, '%d/%m/%Y')
+        else:
+            self.tDate = tDate
+            self.mDate = mDate
+        # self.n = int((self.mDate - self.tDate).days / (calendarDays/freq))
+        # -1 matches the calculated value on www.vbma.org.vn
+        self.fv = fv
+        # plain float64 whatever ac arrives as (scalar, list, Series)
+        self.ac = np.asarray(ac, dtype=np.float64)/ 100
+        self.c = self.ac/ freq
+        self.ytm = ytm/ 100
+        self.y = self.ytm/ freq
+        self.apmt = self.ac * fv
+        self.pmt = self.apmt/ freq
+        self.freq = freq
+
+        if calendarDays==360:
+            n, T, t = _calendar_360(self.tDate.year, self.tDate.month, self.tDate.day,
+                                    self.mDate.year, self.mDate.month, self.mDate.day, freq)
+        else:
+            pass
+        self.n = n
+        self.t = t
+        self.T = T
+        self.calendarDays = calendarDays
+        return
+
+    # def __repr__(self):
+        # return
+
+    def simplePrice(self):
+        '''
+        Calculates the present value of a fixed rate bond.
+        '''
+        c = self.c
+        pmt = self.pmt
+        y = self.y
+        n = self.n
+        fv = self.fv
+        PV = (pmt)/ y * (1 - 1/(1+y)**n) + fv/ (1+y)**n
+        return PV
+
+
+    def simpleYield(self):
+        '''
+        Calculates the simple yield also known as the Japanese simple yield.
+        More relevant for buy-and-hold investors.
+        '''
+        PV = self.bondPrice()
+        ac = self.ac
+        fv = self.fv
+        apmt = self.apmt
+        SY = (apmt + (fv - PV)/apmt)/ PV
+        return SY
+
+
+    def approximateYield(self):
+        '''
+        Calculates the approximate yield of a bond
+        '''
+        PV = self.dirtyPrice()
+        fv = self.fv
+        n = self.n
+        pmt = self.pmt
+        AY = (pmt + (fv - PV)/n) / ((PV + fv)/2)
+        return AY
+
+
+    def yieldGuess(self, price):
+        '''
+        Approximate yield per period at the given price, used to seed Newton.
+        Clamped to [0.0001, 0.5] so deep-discount or distressed prices stay solvable.
+        '''
+        fv = self.fv
+        n = self.n
+        pmt = np.mean(self.pmt)
+        AY = (pmt + (fv - price)/n) / ((price + fv)/2)
+        return max(1e-4, min(AY, 0.5))
+
+
+
+    @staticmethod
+    def calendar_360(tDate, mDate, freq):
+        return _calendar_360(tDate.year, tDate.month, tDate.day,
+                             mDate.year, mDate.month, mDate.day, freq)
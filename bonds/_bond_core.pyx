@@ -0,0 +1,58 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+'''
+Compiled yield solver for coupon lists, the ahead-of-time counterpart of
+the numba kernels in _kernels.py (no JIT warmup).
+
+Build in place with:  python setup.py build_ext --inplace
+'''
+from libc.math cimport exp, log1p, fabs, NAN
+
+
+cdef double _pv_and_deriv(double y, const double[::1] pmt, const double[::1] N, double fv,
+                          long n, double tT, double price, double* dP) noexcept nogil:
+    '''
+    Returns dirtyPrice - price and writes d(dirtyPrice)/dy to dP.
+    '''
+    cdef double ly = log1p(y)
+    cdef double pv = 0.0
+    cdef double dpv = 0.0
+    cdef double e, d
+    cdef Py_ssize_t i
+    for i in range(pmt.shape[0]):
+        e = N[i] - tT
+        d = pmt[i] * exp(-e * ly)
+        pv += d
+        dpv -= e * d
+    e = n - tT
+    d = fv * exp(-e * ly)
+    pv += d
+    dpv -= e * d
+    dP[0] = dpv/ (1.0 + y)
+    return pv - price
+
+
+cdef double _newton_yield(const double[::1] pmt, const double[::1] N, double fv, long n,
+                          double tT, double price, double x0) noexcept nogil:
+    cdef double x = x0
+    cdef double f, dpv
+    cdef int k
+    for k in range(30):
+        f = _pv_and_deriv(x, pmt, N, fv, n, tT, price, &dpv)
+        x -= f/ dpv
+        if fabs(f) < 1e-10:
+            return x
+    return NAN
+
+
+def solve_ytm(const double[::1] pmt, const double[::1] N, double fv, long n,
+              double tT, double price, double x0):
+    '''
+    Solves for the yield per period with Newton-Raphson, releasing the GIL.
+    Same arguments as _kernels._newton_yield.
+    '''
+    cdef double x
+    with nogil:
+        x = _newton_yield(pmt, N, fv, n, tT, price, x0)
+    if x != x:
+        raise RuntimeError("Yield did not converge")
+    return x
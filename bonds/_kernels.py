@@ -0,0 +1,79 @@
+'''
+numba kernels for the coupon-list yield solver in variablerate_bond.py.
+Imported only when the compiled _bond_core extension is not available,
+or when a float64 batch is solved in parallel.
+
+Written by: Eric Lee
+'''
+import numpy as np
+from numba import njit, prange, float64, int64, types
+
+
+# Signatures are compiled eagerly at import and cached to __pycache__
+# (or NUMBA_CACHE_DIR on read-only installs), so later runs skip the JIT.
+# numba reloads a cache entry by re-importing the module name it was built
+# under, so only the bonds package import caches; script runs recompile.
+_CACHE = bool(__package__)
+
+
+@njit(types.UniTuple(float64, 2)(float64, float64[::1], float64[::1], float64, int64, float64, float64),
+      cache=_CACHE, fastmath=True, error_model='numpy')
+def _pv_and_deriv(y, pmt_arr, N_arr, fv, n, tT, price):
+    '''
+    Returns (dirtyPrice - price, d(dirtyPrice)/dy) for a coupon list.
+    Each discount factor is computed once and shared by both terms, as
+    exp(-e * log1p(y)) with log1p(y) taken once per call.
+
+    tT = fraction of the current coupon period that has passed (0 when t==T)
+    '''
+    ly = np.log1p(y)
+    pv = 0.0
+    dpv = 0.0
+    for i in range(pmt_arr.shape[0]):
+        e = N_arr[i] - tT
+        d = pmt_arr[i] * np.exp(-e * ly)
+        pv += d
+        dpv -= e * d
+    e = n - tT
+    d = fv * np.exp(-e * ly)
+    pv += d
+    dpv -= e * d
+    return pv - price, dpv/ (1.0 + y)
+
+
+@njit(float64(float64[::1], float64[::1], float64, int64, float64, float64, float64),
+      cache=_CACHE, error_model='numpy')
+def _newton_yield(pmt_arr, N_arr, fv, n, tT, price, x0):
+    '''
+    Solves for the yield per period with Newton-Raphson.
+    '''
+    x = x0
+    for _ in range(30):
+        f, dpv = _pv_and_deriv(x, pmt_arr, N_arr, fv, n, tT, price)
+        x -= f/ dpv
+        if abs(f) < 1e-10:
+            return x
+    raise RuntimeError("Yield did not converge")
+
+
+@njit(parallel=True, cache=_CACHE, error_model='numpy')
+def _solve_batch(pmt_mat, N_mat, fv, tT, price, out):
+    '''
+    Solves each row of a zero-padded bond stack on its own thread.
+    out holds the starting guesses and is overwritten with the yields per
+    period, or nan where Newton did not converge.
+    '''
+    for b in prange(pmt_mat.shape[0]):
+        n = int(N_mat[b].max())
+        x = out[b]
+        converged = False
+        for _ in range(30):
+            f, dpv = _pv_and_deriv(x, pmt_mat[b], N_mat[b], fv[b], n, tT[b], price[b])
+            x -= f/ dpv
+            if abs(f) < 1e-10:
+                converged = True
+                break
+        if converged:
+            out[b] = x
+        else:
+            out[b] = np.nan
@@ -6,131 +6,32 @@ Last Edited: 09/27/2018 (mm/dd/yyyy)
 
 Written by: Eric Lee
 '''
-import calendar
-from datetime import datetime, date, timedelta
-import numpy as np
-import pandas as pd
-from scipy.optimize import minimize_scalar, minimize, newton
+try:
+    from ._base import _BondBase
+except ImportError:
+    from _base import _BondBase
 
 
+def _pv_and_deriv(y, pmt, fv, n, tT, price):
+    '''
+    Returns (dirtyPrice - price, d(dirtyPrice)/dy) for a constant coupon bond.
 
-class FixedRateBond:
+    The closed-form annuity is the same identity as simplePrice; the powers
+    of (1+y) are computed once and shared by the price and its derivative.
+    tT = fraction of the current coupon period that has passed (0 when t==T)
+    '''
+    base = 1.0 + y
+    v = base**-n
+    s = base**tT
+    annuity = pmt/y * (1-v) + fv*v
+    annuity_prime = -pmt/y**2 * (1-v) + n*(pmt/y - fv) * v/base
+    return annuity*s - price, (annuity_prime + tT*annuity/base) * s
 
 
-    def __init__(self, tDate, mDate, fv, ac, freq, ytm=np.nan, c_list=[], calendarDays=365):
-        '''
-        Passes on variables needed for all bond calculations.
-        
-        tDate = transaction date
-        mDate = maturity date
-        n = number of periods
-        
-        fv = face/par value
-        ac = annual coupon rate
-        c = coupon rate per period
-        ytm = yield to maturity (annual)
-        y = yield per period
-        apmt = annual coupon
-        pmt = coupon per period
-        freq = coupon frequency per year
-        t = days passed since last coupon
-        T = days per coupon period
-        '''
-        if np.isnan(ytm):
-            print("***WARNING*** No YTM specified!")
-        if (isinstance(tDate,str) and isinstance(mDate,str)):
-            self.tDate = datetime.strptime(tDate, '%d/%m/%Y')
-            self.mDate = datetime.strptime(mDate, '%d/%m/%Y')
-        else:
-            self.tDate = tDate
-            self.mDate = mDate
-        self.fv = fv
-        self.ac = np.array(ac)/ 100
-        self.c = self.ac/ freq
-        self.ytm = ytm/ 100
-        self.y = self.ytm/ freq
-        self.apmt = np.array(self.ac) * fv
-        self.pmt = self.apmt/ freq
-        self.freq = freq
-        
-        if calendarDays==360:
-            n, T, t = self.calendar_360()
-        else:
-            pass
-        self.n = n
-        self.t = t
-        self.T = T
-        self.calendarDays = calendarDays
-        return
-        
 
-    def simplePrice(self):
-        '''
-        Calculates the present value of a fixed rate bond.
-        '''
-        c = self.c
-        pmt = self.pmt
-        y = self.y
-        n = self.n
-        fv = self.fv
-        PV = (pmt)/ y * (1 - 1/(1+y)**n) + fv/ (1+y)**n
-        return PV
-        
-        
-    def simpleYield(self):
-        '''
-        Calculates the simple yield also known as the Japanese simple yield.
-        More relevant for buy-and-hold investors.
-        '''
-        PV = self.bondPrice()
-        ac = self.ac
-        fv = self.fv
-        apmt = self.apmt
-        SY = (apmt + (fv - PV)/apmt)/ PV
-        return SY
-        
+class FixedRateBond(_BondBase):
 
-    def approximateYield(self):
-        '''
-        Calculates the approximate yield of a bond
-        '''
-        PV = self.dirtyPrice()
-        fv = self.fv
-        n = self.n
-        pmt = self.pmt
-        AY = (pmt + (fv - PV)/n) / ((PV + fv)/2)
-        return AY
-    
-    
-    
-    def calendar_360(self):
-        tDate = self.tDate
-        mDate = self.mDate
-        
-        t_year = tDate.year
-        m_year = mDate.year
-        t_month = tDate.month
-        m_month = mDate.month
-        t_day = tDate.day
-        m_day = mDate.day
-        
-        if (t_month==2) and (t_day==calendar.monthrange(t_year,t_month)[-1]):
-            t_day = 30
-        if (m_month==2) and (m_day==calendar.monthrange(m_year,m_month)[-1]):
-            m_day = 30
-        if t_day in (30,31) and m_day==31:
-            m_day = 30
-        if t_day>30:
-            t_day = 30
-        
-        n_days = 360*(m_year-t_year) + 30*(m_month-t_month) + (m_day-t_day)
-        n = int(np.ceil(n_days/ 360 * self.freq))
-        T = 360/ self.freq
-        t = T - n_days%T
-        return n, T, t
 
-        
-        
     def dirtyPrice(self):
         '''
         dirtyPrice = cleanPrice + accruedInterest
@@ -153,7 +54,7 @@ class FixedRateBond:
         freq = self.freq
         
         if t==T:
-            dirtyPrice = simplePrice()
+            dirtyPrice = self.simplePrice()
             accruedInterest=0
             cleanPrice = dirtyPrice - accruedInterest
         else:
@@ -164,7 +65,7 @@ class FixedRateBond:
         
 
     
-    def ytm_couponList(self, price, guess=0.05):
+    def ytm_couponList(self, price, guess=None):
         fv = self.fv
         n = self.n
         t = self.t
@@ -173,13 +74,25 @@ class FixedRateBond:
         freq = self.freq
         price=price
         
-        N = np.array(range(n)) + 1
         if t==T:
-            equation = (lambda x: sum([pmt/(1+x)**(i) for i in N]) + fv/(1+x)**(n) - price)
+            tT = 0.0
         else:
-            equation = (lambda x: sum([pmt/(1+x)**(i-t/T) for i in N]) \
-                        + fv/(1+x)**(n-t/T) - price)
-        return equation
+            tT = t/T
+        # closed-form yields: zero coupon, or priced at par on a coupon date
+        if pmt==0:
+            return ((fv/price)**(1.0/(n - tT)) - 1.0) * freq
+        if abs(price - fv) < 1e-10 and tT==0:
+            return self.ac
+        if guess is None:
+            guess = self.yieldGuess(price)
+        y = guess
+        for _ in range(30):
+            f, fp = _pv_and_deriv(y, pmt, fv, n, tT, price)
+            dy = f/ fp
+            y -= dy
+            if abs(dy) < 1e-12:
+                return y * freq
+        raise RuntimeError("Yield did not converge")
 
 		
 if __name__ == '__main__':
@@ -187,5 +100,5 @@ if __name__ == '__main__':
     # print(bm.dirtyPrice())
     # print(bm.calendar_360())
     
-    ytm = newton(bi.ytm_couponList(price=101.958172), x0=0.05, maxiter=1000)
+    ytm = bi.ytm_couponList(price=101.958172)
     print(ytm)
\ No newline at end of file
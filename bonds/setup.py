@@ -0,0 +1,13 @@
+'''
+Builds the optional compiled yield solver (_bond_core) used by variablerate_bond.py
+
+    python setup.py build_ext --inplace
+'''
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+
+setup(
+    ext_modules=cythonize([Extension('_bond_core', ['_bond_core.pyx'],
+                                     extra_compile_args=['-O3', '-march=native'])]),
+)
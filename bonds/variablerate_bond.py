@@ -6,135 +6,72 @@ Last Edited: 09/28/2018 (mm/dd/yyyy)
 
 Written by: Eric Lee
 '''
-import calendar
-from datetime import datetime, date, timedelta
 import numpy as np
-import pandas as pd
-from scipy.optimize import minimize_scalar, minimize, newton
+try:
+    from ._base import _BondBase
+except ImportError:
+    from _base import _BondBase
+
+
+# prefer the ahead-of-time compiled solver when it has been built (see setup.py);
+# otherwise fall back to the numba kernels, which need numba and JIT at import
+try:
+    from ._bond_core import solve_ytm as _solve_ytm
+except ImportError:
+    try:
+        from _bond_core import solve_ytm as _solve_ytm
+    except ImportError:
+        _solve_ytm = None
+
+
+def _numba_kernels():
+    '''
+    Imports the numba kernels module on first use.
+    '''
+    try:
+        from . import _kernels
+    except ImportError:
+        import _kernels
+    return _kernels
+
+
+if _solve_ytm is None:
+    _solve_ytm = _numba_kernels()._newton_yield
+
+
+def _batch_pv_and_deriv(y, pmt_mat, exps, fv, fv_exps, price):
+    '''
+    Row-wise (dirtyPrice - price, d(dirtyPrice)/dy) for a stack of bonds.
+    '''
+    ly = np.log1p(y)
+    disc = np.exp(-exps * ly[:,None])
+    fv_disc = fv * np.exp(-fv_exps * ly)
+    f = (pmt_mat*disc).sum(1) + fv_disc - price
+    fp = -((pmt_mat*exps*disc).sum(1) + fv_exps*fv_disc) / (1+y)
+    return f, fp
 
 
 # *Note: all coupon payments must be in list/array/series format for correct calculation.
-class BondInfo:
+class BondInfo(_BondBase):
 
 
     def __init__(self, tDate, mDate, fv, ac, freq, ytm=np.nan, c_list=[], calendarDays=365):
-        '''
-        Passes on variables needed for all bond calculations.
-        
-        tDate = transaction date
-        mDate = maturity date
-        n = number of periods
-        
-        fv = face/par value
-        ac = annual coupon rate
-        c = coupon rate per period
-        ytm = yield to maturity (annual)
-        y = yield per period
-        apmt = annual coupon
-        pmt = coupon per period
-        freq = coupon frequency per year
-        t = days passed since last coupon
-        T = days per coupon period
-        '''
-        if np.isnan(ytm):
-            print("***WARNING*** No YTM specified!")
-        if (isinstance(tDate,str) and isinstance(mDate,str)):
-            self.tDate = datetime.strptime(tDate, '%d/%m/%Y')
-            self.mDate = datetime.strptime(mDate, '%d/%m/%Y')
-        else:
-            self.tDate = tDate
-            self.mDate = mDate
-        # self.n = int((self.mDate - self.tDate).days / (calendarDays/freq))
-        # -1 matches the calculated value on www.vbma.org.vn
-        self.fv = fv
-        self.ac = np.array(ac)/ 100
-        self.c = self.ac/ freq
-        self.ytm = ytm/ 100
-        self.y = self.ytm/ freq
-        self.apmt = np.array(self.ac) * fv
-        self.pmt = self.apmt/ freq
-        self.freq = freq
-        
-        if calendarDays==360:
-            n, T, t = self.calendar_360()
+        super().__init__(tDate, mDate, fv, ac, freq, ytm, c_list, calendarDays)
+        n = self.n
+        t = self.t
+        T = self.T
+        # coupons are matched to the remaining periods, as zip() used to do
+        self.pmt = np.ascontiguousarray(self.pmt[:n])
+        self.N = np.arange(1, len(self.pmt)+1, dtype=np.float64)
+        # discounting exponents, t/T is dropped on a coupon date
+        if t==T:
+            self.tT = 0.0
         else:
-            pass
-        self.n = n
-        self.t = t
-        self.T = T
-        self.calendarDays = calendarDays
+            self.tT = t/T
+        self.exps = self.N - self.tT
         return
         
-    # def __repr__(self):
-        # return
 
-    def simplePrice(self):
-        '''
-        Calculates the present value of a fixed rate bond.
-        '''
-        c = self.c
-        pmt = self.pmt
-        y = self.y
-        n = self.n
-        fv = self.fv
-        PV = (pmt)/ y * (1 - 1/(1+y)**n) + fv/ (1+y)**n
-        return PV
-        
-        
-    def simpleYield(self):
-        '''
-        Calculates the simple yield also known as the Japanese simple yield.
-        More relevant for buy-and-hold investors.
-        '''
-        PV = self.bondPrice()
-        ac = self.ac
-        fv = self.fv
-        apmt = self.apmt
-        SY = (apmt + (fv - PV)/apmt)/ PV
-        return SY
-        
-
-    def approximateYield(self):
-        '''
-        Calculates the approximate yield of a bond
-        '''
-        PV = self.dirtyPrice()
-        fv = self.fv
-        n = self.n
-        pmt = self.pmt
-        AY = (pmt + (fv - PV)/n) / ((PV + fv)/2)
-        return AY
-    
-    
-    
-    def calendar_360(self):
-        tDate = self.tDate
-        mDate = self.mDate
-        
-        t_year = tDate.year
-        m_year = mDate.year
-        t_month = tDate.month
-        m_month = mDate.month
-        t_day = tDate.day
-        m_day = mDate.day
-        
-        if (t_month==2) and (t_day==calendar.monthrange(t_year,t_month)[-1]):
-            t_day = 30
-        if (m_month==2) and (m_day==calendar.monthrange(m_year,m_month)[-1]):
-            m_day = 30
-        if t_day in (30,31) and m_day==31:
-            m_day = 30
-        if t_day>30:
-            t_day = 30
-        
-        n_days = 360*(m_year-t_year) + 30*(m_month-t_month) + (m_day-t_day)
-        n = int(np.ceil(n_days/ 360 * self.freq))
-        T = 360/ self.freq
-        t = T - n_days%T
-        return n, T, t
-
-        
-        
     def dirtyPrice(self):
         '''
         dirtyPrice = cleanPrice + accruedInterest
@@ -155,43 +92,99 @@ class BondInfo:
         t = self.t
         T = self.T
         freq = self.freq
-        N = np.array(range(n)) + 1
+        tT = self.tT
         
+        ly = np.log1p(y)
+        disc = np.exp(-self.exps * ly)
+        dirtyPrice = pmt @ disc + fv * np.exp(-(n-tT) * ly)
         if t==T:
-            dirtyPrice = sum([pmt/(1+y)**(i) for pmt,i in zip(pmt,N)]) \
-                            + fv/(1+y)**(n)
             accruedInterest=0
             cleanPrice = dirtyPrice - accruedInterest
         else:
-            dirtyPrice = sum([pmt/(1+y)**(i-t/T) for pmt,i in zip(pmt,N)]) \
-                            + fv/(1+y)**(n-t/T)
-            
-            accruedInterest = (pmt[1] * (t/T))
+            # pmt is cut to the remaining periods, take the coupon from the full list
+            accruedInterest = (self.apmt[1]/ freq * (t/T))
             cleanPrice = dirtyPrice - accruedInterest
         return dirtyPrice, accruedInterest, cleanPrice
         
 
     
-    def ytm_couponList(self, price, guess=0.05):
+    def ytm_couponList(self, price, guess=None):
         fv = self.fv
         n = self.n
-        t = self.t
-        T = self.T
         pmt = self.pmt
         freq = self.freq
         price=price
         
-        N = np.array(range(n)) + 1
-        if t==T:
-            equation = (lambda x: sum([pmt/(1+x)**(i) for pmt,i in zip(pmt,N)]) + fv/(1+x)**(n) - price)
+        # closed-form yields: zero coupon, or constant coupon over every remaining
+        # period priced at par on a coupon date
+        if np.all(pmt==0):
+            return ((fv/price)**(1.0/(n - self.tT)) - 1.0) * freq
+        if abs(price - fv) < 1e-10 and self.tT==0 and len(pmt)==n and np.allclose(pmt, pmt[0]):
+            return self.ac[0]
+        if guess is None:
+            guess = self.yieldGuess(price)
+        return _solve_ytm(pmt, self.N, float(fv), n, self.tT, float(price), guess) * freq
+
+
+    @classmethod
+    def solve_ytm_batch(cls, prices, pmt_matrix, N_matrix, fv_vec, tT_vec, guess=0.05,
+                        dtype=np.float64):
+        '''
+        Solves the yield per period of many bonds at once.
+
+        prices = dirty prices (B)
+        pmt_matrix = coupon per period, zero-padded (B x nmax)
+        N_matrix = period numbers 1..n, zero-padded (B x nmax)
+        fv_vec = face/par values (B)
+        tT_vec = fraction of the current coupon period that has passed (B)
+        dtype = working precision of the iterations, e.g. np.float32 for large books
+
+        In float64 each bond runs its own Newton solve, spread across threads.
+        With a narrower dtype, Newton runs in lockstep over the whole stack,
+        stops at that precision's resolution, and bonds still off by more than
+        1e-10 get one final float64 step.
+        Multiply the result by freq for the annual yield.
+        '''
+        price = np.asarray(prices, dtype=dtype)
+        pmt_mat = np.ascontiguousarray(pmt_matrix, dtype=dtype)
+        N_mat = np.ascontiguousarray(N_matrix, dtype=dtype)
+        fv = np.asarray(fv_vec, dtype=dtype)
+        tT = np.asarray(tT_vec, dtype=dtype)
+        if np.dtype(dtype) == np.float64:
+            y = np.full(price.shape[0], guess, dtype=np.float64)
+            _numba_kernels()._solve_batch(pmt_mat, N_mat, fv, tT, price, y)
+            if np.isnan(y).any():
+                raise RuntimeError("Yield did not converge")
+            return y
+        
+        n = N_mat.max(axis=1)
+        exps = N_mat - tT[:,None]
+        fv_exps = n - tT
+        tol = max(1e-10, 1000 * np.finfo(dtype).eps * np.max(np.abs(price)))
+        
+        y = np.full(price.shape[0], guess, dtype=dtype)
+        for _ in range(30):
+            f, fp = _batch_pv_and_deriv(y, pmt_mat, exps, fv, fv_exps, price)
+            y -= f/ fp
+            if np.max(np.abs(f)) < tol:
+                break
         else:
-            equation = (lambda x: sum([pmt/(1+x)**(i-t/T) for pmt,i in zip(pmt,N)]) \
-                        + fv/(1+x)**(n-t/T) - price)
-        return newton(equation, x0=0.05, maxiter=1000) * freq
+            raise RuntimeError("Yield did not converge")
+        
+        # polish in double precision
+        y = y.astype(np.float64)
+        N_mat = np.asarray(N_matrix, dtype=np.float64)
+        tT = np.asarray(tT_vec, dtype=np.float64)
+        f, fp = _batch_pv_and_deriv(y, np.asarray(pmt_matrix, dtype=np.float64), N_mat - tT[:,None],
+                                    np.asarray(fv_vec, dtype=np.float64), N_mat.max(axis=1) - tT,
+                                    np.asarray(prices, dtype=np.float64))
+        rough = np.abs(f) >= 1e-10
+        y[rough] -= f[rough]/ fp[rough]
+        return y
 
 		
 if __name__ == '__main__':
-    ac = pd.Series([8] * 20)
+    ac = [8] * 20
     bi = BondInfo(tDate='14/02/2011', mDate='15/11/2020', fv=100, ac=ac, ytm=8, freq=2, calendarDays=360)
     print(bi.dirtyPrice())
     # print(bi.calendar_360())
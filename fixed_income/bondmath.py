@@ -5,23 +5,26 @@ Created: 10/10/2018
 Last Edit: 10/29/2018
 """
 
-from scipy.optimize import newton, fsolve
+import numpy as np
+from scipy.optimize import newton
 
 
-def IRR(cash_flows, N, estimate=0.05):
+def IRR(cash_flows, N, price, estimate=0.05):
     """Calculates internal rate of return given parameter values.
     
         Parameters:
             cash_flows: payments arising from coupons and par (array)
             N : number of periods (array)
+            price : price paid for the cash flows
+            estimate : starting guess for the rate per period
     """
-    estimate2 = (cash_flows[0] / price)
-    if estimate2 < price:
-        estimate = estimate2
+    cf = np.ascontiguousarray(cash_flows, dtype=np.float64)
+    N_arr = np.ascontiguousarray(N, dtype=np.float64)
 
     try:
-        equation = (lambda y: sum([pmt / (1 + y)**n for pmt, n in zip(cash_flows, N)]) - price)
-        return newton(equation, estimate, maxiter=300)
+        equation = (lambda y: cf @ (1 + y)**-N_arr - price)
+        derivative = (lambda y: -(cf * N_arr) @ (1 + y)**-(N_arr + 1))
+        return newton(equation, estimate, fprime=derivative, maxiter=50)
     except RuntimeError:
         return np.nan
     